@@ -0,0 +1,255 @@
+"""
+Microbenchmarks for the sensor node's hot paths
+Runs on CPython and the MicroPython unix port with stand-ins for the hardware
+"""
+import sys
+import time
+import json
+import gc
+
+HERE = __file__.rsplit('/', 1)[0] if '/' in __file__ else '.'
+sys.path.insert(0, HERE + '/standins')
+from install import install_standins, MICROPYTHON
+
+USAGE = """Usage:
+    python benchmarks/bench.py [--iterations N] [--output FILE]
+    micropython benchmarks/bench.py [--iterations N] [--output FILE]
+    python benchmarks/bench.py compare OLD.json NEW.json [--threshold PCT]"""
+
+BATCH_SIZES = (1, 10, 50, 150)
+ITERATIONS = 200 if MICROPYTHON else 2000
+OUTPUT_FILE = 'bench_results.json'
+CONFIG_FILE = 'bench_config.json'
+
+# Changes below these are noise, whatever the threshold
+MIN_TIME_DELTA_US = 1
+MIN_ALLOC_DELTA = 32
+
+
+if MICROPYTHON:
+    def now():
+        return time.ticks_us()
+
+    def elapsed_us(start):
+        return time.ticks_diff(time.ticks_us(), start)
+
+    def measure_alloc(func):
+        """Bytes of heap used by one call"""
+        gc.collect()
+        gc.disable()
+        free = gc.mem_free()
+        func()
+        used = free - gc.mem_free()
+        gc.enable()
+        return used
+else:
+    import tracemalloc
+
+    def now():
+        return time.perf_counter()
+
+    def elapsed_us(start):
+        return (time.perf_counter() - start) * 1000000
+
+    def measure_alloc(func):
+        """Peak bytes traced during one call"""
+        gc.collect()
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak - base
+
+
+def measure(func, iterations):
+    func()  # Warm up
+    gc.collect()
+    start = now()
+    for _ in range(iterations):
+        func()
+    return {
+        'us': elapsed_us(start) / iterations,
+        'alloc': measure_alloc(func)
+    }
+
+
+class PublishTime:
+    """time for mqtt_client without the delays around publish"""
+    @staticmethod
+    def sleep_ms(ms):
+        pass
+
+    @staticmethod
+    def ticks_ms():
+        return time.ticks_ms()
+
+    @staticmethod
+    def ticks_diff(end, start):
+        return time.ticks_diff(end, start)
+
+    @staticmethod
+    def time():
+        return time.time()
+
+
+def quiet(*modules):
+    """Silence print in the given modules, so output is not timed"""
+    for module in modules:
+        module.print = lambda *args, **kwargs: None
+
+
+def remove_config():
+    import os
+    try:
+        os.remove(CONFIG_FILE)
+    except OSError:
+        pass
+
+
+def make_settings(number):
+    from config import Config
+    config = {
+        'wifi': {'ssid': 'bench', 'password': 'bench'},
+        'device': {'name': 'Bench-Node'},
+        'mqtt': {
+            'broker': '127.0.0.1',
+            'port': 1883,
+            'username': 'bench',
+            'password': 'bench',
+            'topic': 'sensors/readings'
+        },
+        'readings': {'number': number, 'sleep': 1000}
+    }
+    remove_config()
+    return Config(CONFIG_FILE, config_dict=config), config
+
+
+def run_benchmarks(iterations):
+    from config import Config, AttrDict
+    from led_handler import Led
+    from sensor import CompactSensorNode
+    from readings import ReadingBuffer
+    import sensor
+    import mqtt_client
+    import wifi_utils
+
+    mqtt_client.time = PublishTime
+    quiet(sensor, mqtt_client, wifi_utils)
+    results = {}
+
+    def record(name, func):
+        results[name] = measure(func, iterations)
+        print('%-24s %10.2f us %8d bytes' % (name, results[name]['us'], results[name]['alloc']))
+
+    settings, config = make_settings(BATCH_SIZES[-1])
+    node = CompactSensorNode(Led(2), settings)
+    record('get_reading', node.get_reading)
+    record('config_load', lambda: Config(CONFIG_FILE))
+    record('attrdict', lambda: AttrDict(config))
+
+    for n in BATCH_SIZES:
+        settings, _ = make_settings(n)
+        node = CompactSensorNode(Led(2), settings)
+        readings = ReadingBuffer(n * 2 + 1)
+        for _ in range(n):
+            readings.append(node.get_reading())
+        suffix = '[n=%d]' % n
+
+        record('save_readings' + suffix, lambda: node.save_readings(readings))
+        record('load_readings' + suffix, lambda: node.load_readings(n * 2 + 1))
+        record('save_data' + suffix, lambda: node.save_data(n, readings))
+        record('load_data' + suffix, node.load_data)
+        record('payload' + suffix, readings.to_json)
+        if not node.send_mqtt(readings):
+            raise RuntimeError('send_mqtt failed on the stand-ins')
+        record('send_mqtt' + suffix, lambda: node.send_mqtt(readings))
+
+    return results
+
+
+def compare(old_file, new_file, threshold):
+    """Print changes between two result files, returns the number of regressions and missing entries"""
+    with open(old_file) as f:
+        old = json.load(f)['results']
+    with open(new_file) as f:
+        new = json.load(f)['results']
+
+    regressions = 0
+    for name in sorted(new):
+        if name not in old:
+            print('%-24s new' % name)
+            continue
+        for metric, floor in (('us', MIN_TIME_DELTA_US), ('alloc', MIN_ALLOC_DELTA)):
+            before = old[name][metric]
+            after = new[name][metric]
+            change = (after - before) * 100 / before if before else 0
+            regressed = after - before > floor and after > before * (1 + threshold / 100)
+            if regressed:
+                regressions += 1
+            print('%-24s %-5s %12.2f -> %12.2f %+8.1f%%%s' % (
+                name, metric, before, after, change, '  REGRESSION' if regressed else ''
+            ))
+
+    # A removed or renamed benchmark would otherwise hide a regression
+    missing = 0
+    for name in sorted(old):
+        if name not in new:
+            print('%-24s MISSING' % name)
+            missing += 1
+    print('%d regressions above %s%%, %d missing' % (regressions, threshold, missing))
+    return regressions + missing
+
+
+def usage():
+    print(USAGE)
+    sys.exit(2)
+
+
+def option(args, name, default, convert=str):
+    """Remove --name VALUE from args and return the converted value"""
+    if name not in args:
+        return default
+    i = args.index(name)
+    if i + 1 >= len(args):
+        usage()
+    value = args[i + 1]
+    del args[i:i + 2]
+    try:
+        return convert(value)
+    except ValueError:
+        usage()
+
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] == 'compare':
+        threshold = option(args, '--threshold', 10, float)
+        if len(args) != 3:
+            usage()
+        if compare(args[1], args[2], threshold):
+            sys.exit(1)
+        return
+
+    iterations = option(args, '--iterations', ITERATIONS, int)
+    output = option(args, '--output', OUTPUT_FILE)
+    if args:
+        usage()
+
+    install_standins()
+    try:
+        results = run_benchmarks(iterations)
+    finally:
+        remove_config()
+    with open(output, 'w') as f:
+        json.dump({
+            'implementation': sys.implementation.name,
+            'platform': sys.platform,
+            'iterations': iterations,
+            'results': results
+        }, f)
+    print('Results written to', output)
+
+
+if __name__ == '__main__':
+    main()
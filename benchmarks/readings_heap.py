@@ -0,0 +1,86 @@
+"""
+Heap used per wake and largest batch in RTC memory, for the reading storage
+before and after the switch to ReadingBuffer
+The "before" path is the list-of-dicts and JSON code CompactSensorNode used,
+kept here so both can be measured on the same tree
+
+    python benchmarks/readings_heap.py
+    micropython benchmarks/readings_heap.py
+"""
+import time
+import json
+from bench import measure_alloc
+from install import install_standins
+
+BATCH_SIZES = (5, 20, 50)
+VALUES = ('23.45C', '1013.25hPa', '45.67%')
+# RTC memory left for readings: rtc_store magic and section header, then the count byte
+RTC_BUDGET = 2048 - 2 - 3 - 1
+
+
+def dict_wake(stored, number):
+    """One CompactSensorNode wake with the old storage"""
+    readings = json.loads(stored.decode())
+    temp, pressure, humidity = VALUES
+    readings.append({
+        'timestamp': int(time.time()),  # An int on the ESP32
+        'temp': float(temp.replace('C', '')),
+        'pressure': float(pressure.replace('hPa', '')),
+        'humidity': float(humidity.replace('%', ''))
+    })
+    if len(readings) > number:
+        readings = readings[-number:]
+    return bytes([len(readings)]) + json.dumps(readings).encode()
+
+
+def dict_stored(count):
+    reading = {'timestamp': 1700000000, 'temp': 23.45, 'pressure': 1013.25, 'humidity': 45.67}
+    return json.dumps([reading] * count).encode()
+
+
+def buffer_wake(stored, number):
+    """One CompactSensorNode wake with ReadingBuffer"""
+    from readings import Reading, ReadingBuffer, parse_scaled
+    readings = ReadingBuffer(number)
+    readings.load_bytes(stored)
+    temp, pressure, humidity = VALUES
+    readings.append(Reading(
+        int(time.time()),
+        parse_scaled(temp[:-1]),
+        parse_scaled(pressure[:-3]),
+        parse_scaled(humidity[:-1])
+    ))
+    return readings.to_bytes(bytes([len(readings)]))
+
+
+def buffer_stored(count):
+    from readings import ReadingBuffer
+    readings = ReadingBuffer(max(count, 1))
+    for _ in range(count):
+        readings.add(1700000000, 2345, 101325, 4567)
+    return bytes(readings.to_bytes())
+
+
+def max_batch(stored):
+    """Largest number of readings whose serialized form fits in RTC_BUDGET"""
+    n = 0
+    while len(stored(n + 1)) <= RTC_BUDGET:
+        n += 1
+    return n
+
+
+def main():
+    install_standins()
+    print('%-8s %6s %12s %12s' % ('storage', 'batch', 'heap/wake', 'RTC bytes'))
+    for name, wake, stored in (('dicts', dict_wake, dict_stored),
+                               ('buffer', buffer_wake, buffer_stored)):
+        for n in BATCH_SIZES:
+            data = stored(n - 1)
+            wake(data, n)  # Warm up imports
+            heap = measure_alloc(lambda: wake(data, n))
+            print('%-8s %6d %12d %12d' % (name, n, heap, len(wake(data, n))))
+        print('%-8s max batch in RTC memory: %d' % (name, max_batch(stored)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+"""Stand-in for the bme280 driver, returns fixed formatted values"""
+
+
+class BME280:
+    def __init__(self, i2c=None, address=0x77):
+        self.i2c = i2c
+        self.address = address
+
+    @property
+    def values(self):
+        return ('23.45C', '1013.25hPa', '45.67%')
@@ -0,0 +1,37 @@
+"""
+Puts the stand-ins in place of the hardware modules, shared by the scripts in benchmarks
+"""
+import sys
+import time
+
+MICROPYTHON = sys.implementation.name == 'micropython'
+
+HERE = __file__.rsplit('/', 1)[0] if '/' in __file__ else '.'
+ROOT = HERE + '/../..'
+
+
+def install_standins(tls=False):
+    """Replace hardware modules with the stand-ins, tls adds the CPython-only ssl stand-in"""
+    sys.path.insert(0, ROOT)
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    import machine_standin
+    import bme280_standin
+    import network_standin
+    import umqtt_standin
+    sys.modules['machine'] = machine_standin
+    sys.modules['bme280'] = bme280_standin
+    sys.modules['network'] = network_standin
+    sys.modules['umqtt'] = umqtt_standin
+    sys.modules['umqtt.simple'] = umqtt_standin
+    if tls:
+        import ssl_standin
+        sys.modules['ssl'] = ssl_standin
+
+    if not MICROPYTHON:
+        # MicroPython time functions used by the node
+        time.sleep_ms = lambda ms: time.sleep(ms / 1000)
+        time.ticks_ms = lambda: int(time.monotonic() * 1000)
+        time.ticks_us = lambda: int(time.monotonic() * 1000000)
+        time.ticks_diff = lambda end, start: end - start
+        sys.modules['utime'] = time
@@ -0,0 +1,52 @@
+"""Stand-in for the machine module, enough to construct the sensor node"""
+DEEPSLEEP_RESET = 4
+PWRON_RESET = 1
+
+
+class Pin:
+    OUT = 1
+    IN = 0
+
+    def __init__(self, pin, mode=IN):
+        self.pin = pin
+        self.state = 0
+
+    def value(self, state=None):
+        if state is None:
+            return self.state
+        self.state = int(state)
+
+    def on(self):
+        self.state = 1
+
+    def off(self):
+        self.state = 0
+
+
+class I2C:
+    def __init__(self, bus, scl=None, sda=None):
+        self.bus = bus
+
+
+class RTC:
+    # Shared like the real RTC memory, every instance sees the same bytes
+    _memory = b''
+
+    def memory(self, data=None):
+        if data is None:
+            return RTC._memory
+        if len(data) > 2048:
+            raise ValueError('RTC memory is 2048 bytes')
+        RTC._memory = bytes(data)
+
+
+def deepsleep(ms=0):
+    raise SystemExit('deepsleep')
+
+
+def reset():
+    raise SystemExit('reset')
+
+
+def reset_cause():
+    return DEEPSLEEP_RESET
@@ -0,0 +1,28 @@
+"""Stand-in for the network module, the station is always connected"""
+STA_IF = 0
+AP_IF = 1
+STAT_WRONG_PASSWORD = 202
+STAT_NO_AP_FOUND = 201
+
+
+class WLAN:
+    def __init__(self, interface):
+        self.interface = interface
+        self.enabled = False
+
+    def active(self, enabled=None):
+        if enabled is None:
+            return self.enabled
+        self.enabled = enabled
+
+    def connect(self, ssid, password):
+        pass
+
+    def isconnected(self):
+        return True
+
+    def ifconfig(self):
+        return ('192.168.68.2', '255.255.255.0', '192.168.68.1', '192.168.68.1')
+
+    def status(self):
+        return 1010
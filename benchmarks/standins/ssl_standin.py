@@ -0,0 +1,91 @@
+"""
+Stand-in for the port's ssl module, backed by CPython's ssl
+Provides the session interface TlsSessionContext relies on: SSLSession(bytes),
+bytes(session), sock.session, sock.session_reused and wrap_socket(session=).
+CPython sessions cannot be serialized and only resume on the context that
+made them, so bytes(session) is a token for a session and context kept in
+this process, padded to the size of a serialized session. This checks the
+wiring and the RTC memory budget, not real session serialization
+"""
+import os
+import ssl
+import time
+
+PROTOCOL_TLS_CLIENT = ssl.PROTOCOL_TLS_CLIENT
+CERT_NONE = ssl.CERT_NONE
+CERT_REQUIRED = ssl.CERT_REQUIRED
+
+# Fail handshakes offering a session, like a port that errors on a rejected session
+REJECT_RESUME = False
+# Hide session_reused, like a port that cannot tell if a session was resumed
+REPORT_REUSED = True
+# Bytes of a serialized session, roughly an mbedtls session with a ticket
+SESSION_SIZE = 400
+TOKEN_SIZE = 8
+
+# Duration of the last handshake, measured here for sub-millisecond precision
+last_handshake_ms = None
+
+_sessions = {}
+
+
+class SSLSession(bytes):
+    pass
+
+
+class SSLSocket:
+    def __init__(self, sock, context):
+        self.sock = sock
+        self.context = context
+
+    @property
+    def session(self):
+        session = self.sock.session
+        if session is None:
+            return None
+        token = os.urandom(TOKEN_SIZE)
+        _sessions[token] = (self.context, session)
+        return SSLSession(token + bytes(SESSION_SIZE - TOKEN_SIZE))
+
+    def __getattr__(self, name):
+        if name == 'session_reused' and REPORT_REUSED:
+            return self.sock.session_reused
+        raise AttributeError(name)
+
+    def read(self, n):
+        return self.sock.recv(n)
+
+    def write(self, data):
+        return self.sock.send(data)
+
+    def close(self):
+        self.sock.close()
+
+
+class SSLContext:
+    def __init__(self, protocol):
+        self.context = ssl.SSLContext(protocol)
+
+    def load_verify_locations(self, cafile=None, cadata=None):
+        self.context.load_verify_locations(cafile=cafile, cadata=cadata)
+
+    @property
+    def verify_mode(self):
+        return self.context.verify_mode
+
+    @verify_mode.setter
+    def verify_mode(self, mode):
+        self.context.check_hostname = mode == CERT_REQUIRED
+        self.context.verify_mode = mode
+
+    def wrap_socket(self, sock, server_hostname=None, session=None):
+        context = self.context
+        if session is not None:
+            if REJECT_RESUME:
+                raise OSError('TLS session rejected')
+            context, session = _sessions.get(bytes(session)[:TOKEN_SIZE], (context, None))
+        global last_handshake_ms
+        start = time.perf_counter()
+        sock = context.wrap_socket(sock, server_hostname=server_hostname, session=session)
+        last_handshake_ms = (time.perf_counter() - start) * 1000
+        return SSLSocket(sock, context)
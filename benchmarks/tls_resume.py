@@ -0,0 +1,147 @@
+"""
+Checks TLS session resumption against a local TLS broker stand-in
+Runs on CPython, generates a self-signed CA with openssl and reports
+handshake times of full and resumed connections. The ssl stand-in keeps the
+real sessions in this process and puts a padded token in RTC memory, so
+this checks the wiring and the RTC memory budget, not session serialization
+
+    python benchmarks/tls_resume.py [--wakes N]
+"""
+import sys
+import ssl
+import socket
+import subprocess
+import tempfile
+import threading
+
+HERE = __file__.rsplit('/', 1)[0] if '/' in __file__ else '.'
+sys.path.insert(0, HERE + '/standins')
+from install import install_standins
+
+WAKES = 10
+HOST = '127.0.0.1'
+# Readings large enough that a session no longer fits next to them
+READINGS_SIZE = 1700
+
+
+def make_certificates(directory):
+    """Self-signed CA and a server certificate for HOST, returns the file paths"""
+    def openssl(*args):
+        subprocess.run(('openssl',) + args, check=True, capture_output=True)
+
+    ca_key, ca_crt = directory + '/ca.key', directory + '/ca.crt'
+    key, csr, crt = directory + '/server.key', directory + '/server.csr', directory + '/server.crt'
+    ext = directory + '/server.ext'
+    openssl('req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+            '-keyout', ca_key, '-out', ca_crt, '-subj', '/CN=bench-ca')
+    openssl('req', '-newkey', 'rsa:2048', '-nodes', '-keyout', key, '-out', csr,
+            '-subj', '/CN=' + HOST)
+    with open(ext, 'w') as f:
+        f.write('subjectAltName=IP:' + HOST + '\n')
+    openssl('x509', '-req', '-in', csr, '-CA', ca_crt, '-CAkey', ca_key, '-CAcreateserial',
+            '-days', '1', '-extfile', ext, '-out', crt)
+    return ca_crt, crt, key
+
+
+class TlsBroker:
+    """Accepts TLS connections and does nothing else, like a broker that never gets a CONNECT"""
+    def __init__(self, certfile, keyfile):
+        self.certfile = certfile
+        self.keyfile = keyfile
+        self.restart()
+        self.server = socket.socket()
+        self.server.bind((HOST, 0))
+        self.server.listen(5)
+        self.port = self.server.getsockname()[1]
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def restart(self):
+        """New context and session cache, previously issued sessions are rejected"""
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        # TLS 1.2 makes the session available right after the handshake
+        context.maximum_version = ssl.TLSVersion.TLSv1_2
+        context.load_cert_chain(self.certfile, self.keyfile)
+        self.context = context
+
+    def serve(self):
+        while True:
+            conn, _ = self.server.accept()
+            try:
+                with self.context.wrap_socket(conn, server_side=True) as tls:
+                    tls.recv(1)
+            except (OSError, ssl.SSLError):
+                pass
+
+
+def wake(ca_file, port):
+    """Connect like one wake of the node, only RTC memory survives between calls"""
+    from mqtt_client import MqttClient
+    mqtt = MqttClient('tls-check', HOST, mqtt_port=port, tls=True, ca_file=ca_file)
+    mqtt.connect_any()
+    mqtt.client.disconnect()
+    resumed = mqtt.tls.resumed
+    return 'unknown' if resumed is None else 'resumed' if resumed else 'full'
+
+
+def main():
+    args = sys.argv[1:]
+    wakes = int(args[args.index('--wakes') + 1]) if '--wakes' in args else WAKES
+    install_standins(tls=True)
+    import ssl_standin
+    import rtc_store
+    failures = 0
+
+    def check(name, expected, count=1):
+        nonlocal failures
+        times = []
+        kinds = []
+        for _ in range(count):
+            kind = wake(ca_file, broker.port)
+            if kind != expected:
+                failures += 1
+            kinds.append(kind)
+            times.append(ssl_standin.last_handshake_ms)
+        print('%-36s %-8s %8.2f ms  (%d wakes%s)' % (
+            name, expected, sum(times) / len(times), count,
+            '' if kinds == [expected] * count else ', got ' + ', '.join(kinds)
+        ))
+
+    with tempfile.TemporaryDirectory() as directory:
+        ca_file, certfile, keyfile = make_certificates(directory)
+        broker = TlsBroker(certfile, keyfile)
+
+        check('first wake, no cached session', 'full')
+        check('later wakes', 'resumed', wakes)
+
+        broker.restart()
+        check('broker restarted, session unknown', 'full')
+        check('wake after renegotiated session', 'resumed')
+
+        ssl_standin.REJECT_RESUME = True
+        check('resume error, full fallback', 'full')
+        ssl_standin.REJECT_RESUME = False
+        check('wake after fallback', 'resumed')
+
+        ssl_standin.REPORT_REUSED = False
+        check('port without session_reused', 'unknown')
+        ssl_standin.REPORT_REUSED = True
+
+        # Readings take priority, the cached session is evicted to make room
+        rtc_store.save(rtc_store.READINGS, bytes(READINGS_SIZE))
+        check('readings fill RTC, session evicted', 'full')
+        check('session does not fit next to them', 'full')
+        readings = rtc_store.load(rtc_store.READINGS)
+        if readings is None or len(readings) != READINGS_SIZE:
+            print('readings lost while caching the session')
+            failures += 1
+        rtc_store.clear(rtc_store.READINGS)
+        check('readings sent, session cached again', 'full')
+        check('wake after that', 'resumed')
+
+    print('%d unexpected results' % failures)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
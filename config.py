@@ -17,24 +17,30 @@ class AttrDict(dict):
         except KeyError:
             raise AttributeError(f"No attribute '{name}'")
     
-    def validate(self, expected_attrs):
+    def has_attr(self, attr):
         try:
-            for expected_attr in expected_attrs:
-                splitted = expected_attr.split('__')
-                res = self[splitted[0]]
-                for x in splitted[1:]:
-                    res = res[x]
-        except KeyError as ex:
-            print('Missing key:', ex)
+            splitted = attr.split('__')
+            res = self[splitted[0]]
+            for x in splitted[1:]:
+                res = res[x]
+        except KeyError:
             return False
         return True
     
+    def validate(self, expected_attrs):
+        for expected_attr in expected_attrs:
+            # Alternatives are separated by |, any one of them is enough
+            if not any(self.has_attr(attr) for attr in expected_attr.split('|')):
+                print('Missing key:', expected_attr)
+                return False
+        return True
+    
 class Config:
     expected_attrs = (
         'wifi__ssid',
         'wifi__password',
         'device__name',
-        'mqtt__broker',
+        'mqtt__broker|mqtt__brokers',
         'mqtt__port',
         'mqtt__username',
         'mqtt__password',
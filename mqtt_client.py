@@ -1,24 +1,307 @@
 import time
-from umqtt.simple import MQTTClient
+import json
+import gc
+import errno
+import socket
+from umqtt.simple import MQTTClient, MQTTException
+import rtc_store
+
+DNS_TTL = 3600  # Seconds a resolved broker address is reused
+CONNECT_TIMEOUT = 5  # Seconds before an unresponsive broker is given up
+
+# Sort keys for brokers without a measured latency
+UNKNOWN_LATENCY = 30000
+FAILED_LATENCY = 60000
+
+
+def is_timeout(ex):
+    return getattr(ex, 'errno', None) == errno.ETIMEDOUT or str(ex) == 'timed out'
+
+
+class BrokerCache:
+    """
+    Resolved address and last-known connect latency of each broker, kept in RTC memory
+    Saves a DNS round-trip per wake and tries the healthiest broker first
+    """
+    def __init__(self, hosts, port, ttl=DNS_TTL):
+        self.hosts = hosts
+        self.port = port
+        self.ttl = ttl
+        self.entries = self.load()
+
+    def load(self):
+        """Load host -> [address, resolved_at, latency_ms] from RTC memory"""
+        try:
+            data = rtc_store.load(rtc_store.BROKERS)
+            if data:
+                return json.loads(data.decode())
+            return {}
+        except:
+            return {}
+
+    def save(self):
+        rtc_store.save(rtc_store.BROKERS, json.dumps(self.entries).encode())
+
+    def ordered(self):
+        """Brokers by last-known latency, config order breaks ties"""
+        def key(i):
+            entry = self.entries.get(self.hosts[i])
+            latency = entry[2] if entry else None
+            return (UNKNOWN_LATENCY if latency is None else latency, i)
+        return [self.hosts[i] for i in sorted(range(len(self.hosts)), key=key)]
+
+    def resolve(self, host, refresh=False):
+        """Return (address, cached) for host, resolving it when expired or on refresh"""
+        now = time.time()
+        entry = self.entries.get(host)
+        if not refresh and entry and entry[0] and 0 <= now - entry[1] < self.ttl:
+            return entry[0], True
+
+        address = socket.getaddrinfo(host, self.port)[0][-1][0]
+        self.entries[host] = [address, now, entry[2] if entry else None]
+        return address, False
+
+    def record(self, host, latency_ms):
+        """Store connect latency, or mark the broker failed when None"""
+        entry = self.entries.get(host)
+        if entry is None:
+            entry = self.entries[host] = [None, 0, None]
+        if latency_ms is None:
+            # Address may have changed, resolve again on the next try
+            entry[0] = None
+            entry[2] = FAILED_LATENCY
+        else:
+            entry[2] = latency_ms
+
+
+class TlsSessionContext:
+    """
+    SSLContext wrapper that resumes the TLS session cached in RTC memory
+    A resumed handshake skips the certificate exchange and key agreement,
+    so later wakes spend far less CPU and radio time connecting.
+    Needs ssl.SSLSession(bytes), bytes(session), sock.session and the
+    session argument of wrap_socket, without them every handshake is full
+    """
+    def __init__(self, ca_file=None):
+        import ssl
+        self.ssl = ssl
+        self.context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        if ca_file:
+            self.context.load_verify_locations(cafile=ca_file)
+            self.context.verify_mode = ssl.CERT_REQUIRED
+        else:
+            self.context.verify_mode = ssl.CERT_NONE
+        self.session_used = False
+        # Set when a handshake offering the cached session fails
+        self.resume_failed = False
+        # True or False, None when the port cannot tell if the session was resumed
+        self.resumed = False
+        self.handshake_ms = None
+        # Brokers are dialled by address, keep the name for SNI, verification
+        # and to key the session cache
+        self.hostname = ''
+
+    def load_sessions(self):
+        """Cached sessions by broker host"""
+        sessions = {}
+        data = rtc_store.load(rtc_store.TLS_SESSION)
+        if not data:
+            return sessions
+
+        # Each entry is: host length (1 byte), host, session length (2 bytes), session
+        i = 0
+        try:
+            while i < len(data):
+                size = data[i]
+                host = bytes(data[i + 1:i + 1 + size]).decode()
+                i += 1 + size
+                size = (data[i] << 8) | data[i + 1]
+                i += 2
+                sessions[host] = data[i:i + size]
+                i += size
+        except (IndexError, ValueError):
+            print("Invalid TLS session cache")
+        return sessions
+
+    def store_sessions(self, sessions):
+        data = bytearray()
+        for host, session in sessions.items():
+            host = host.encode()
+            data.append(len(host))
+            data.extend(host)
+            data.append(len(session) >> 8)
+            data.append(len(session) & 0xff)
+            data.extend(session)
+        if not rtc_store.save(rtc_store.TLS_SESSION, data):
+            print("TLS session does not fit in RTC memory")
+
+    def load_session(self):
+        """Restore the session cached for this broker, if the port supports it"""
+        if not hasattr(self.ssl, 'SSLSession'):
+            return None
+        data = self.load_sessions().get(self.hostname)
+        if not data:
+            return None
+        try:
+            return self.ssl.SSLSession(data)
+        except Exception as e:
+            print(f"Invalid TLS session: {e}")
+            self.forget_session()
+            return None
+
+    def save_session(self, sock):
+        """Cache the session of an established connection"""
+        session = getattr(sock, 'session', None)
+        if session is None:
+            return
+        try:
+            sessions = self.load_sessions()
+            sessions[self.hostname] = bytes(session)
+            self.store_sessions(sessions)
+        except Exception as e:
+            print(f"TLS session not saved: {e}")
+
+    def forget_session(self):
+        """Drop the session cached for this broker"""
+        self.session_used = False
+        sessions = self.load_sessions()
+        if self.hostname in sessions:
+            del sessions[self.hostname]
+            self.store_sessions(sessions)
+
+    def wrap_socket(self, sock, server_hostname=None):
+        if not self.hostname:
+            self.hostname = server_hostname
+        server_hostname = self.hostname
+        session = self.load_session()
+        self.session_used = session is not None
+
+        start = time.ticks_ms()
+        if session is not None:
+            try:
+                sock = self.context.wrap_socket(
+                    sock, server_hostname=server_hostname, session=session
+                )
+            except OSError:
+                self.resume_failed = True
+                raise
+        else:
+            sock = self.context.wrap_socket(sock, server_hostname=server_hostname)
+        self.handshake_ms = time.ticks_diff(time.ticks_ms(), start)
+
+        # The broker may ignore the offered session without telling
+        self.resumed = getattr(sock, 'session_reused', None) if self.session_used else False
+        kind = 'unknown' if self.resumed is None else 'resumed' if self.resumed else 'full'
+        print(f"TLS handshake ({kind}): {self.handshake_ms}ms")
+        self.save_session(sock)
+        return sock
+
 
 class MqttClient:
-    def __init__(self, device, mqtt_host, mqtt_port=1883, mqtt_user=None, mqtt_password=None):
+    def __init__(self, device, mqtt_host, mqtt_port=1883, mqtt_user=None, mqtt_password=None,
+                 tls=False, ca_file=None, dns_ttl=DNS_TTL, timeout=CONNECT_TIMEOUT):
         self.device = device
-        self.broker = mqtt_host
+        # A single broker or a list of brokers to fail over between
+        self.brokers = [mqtt_host] if isinstance(mqtt_host, str) else list(mqtt_host)
+        self.broker = None
         self.port = mqtt_port
         self.username = mqtt_user
         self.password = mqtt_password
+        self.use_tls = tls
+        self.ca_file = ca_file
+        # Created on first connect, most wakes only take a reading
+        self.tls = None
+        self.dns_ttl = dns_ttl
+        self.timeout = timeout
+        # Loaded from RTC memory on first connect
+        self.cache = None
+        self.client = None
+
+    def create_client(self, host, address):
+        self.broker = host
+        if self.use_tls:
+            if self.tls is None:
+                self.tls = TlsSessionContext(self.ca_file)
+            self.tls.hostname = host
         self.client = MQTTClient(
             self.device,
-            self.broker,
+            address,
             port=self.port,
             user=self.username,
-            password=self.password
+            password=self.password,
+            ssl=self.tls
         )
-        
+
+    def close_socket(self):
+        """Free the socket and TLS context of a failed connection"""
+        sock = getattr(self.client, 'sock', None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+            self.client.sock = None
+        gc.collect()
+
+    def connect(self):
+        if self.tls:
+            self.tls.resume_failed = False
+        try:
+            self.client.connect(timeout=self.timeout)
+        except OSError:
+            # Broker rejected the resumed session, fall back to a full handshake
+            if not (self.tls and self.tls.resume_failed):
+                raise
+            print("TLS session resumption failed, retrying with full handshake")
+            self.close_socket()
+            self.tls.forget_session()
+            self.client.connect(timeout=self.timeout)
+
+    def connect_address(self, host, address):
+        """Connect to host at address, returns the connect latency in ms"""
+        self.create_client(host, address)
+        start = time.ticks_ms()
+        self.connect()
+        return time.ticks_diff(time.ticks_ms(), start)
+
+    def connect_host(self, host):
+        """Connect to host, retrying once if its cached address was refused and has changed"""
+        address, cached = self.cache.resolve(host)
+        try:
+            return self.connect_address(host, address)
+        except OSError as e:
+            # A timeout means the broker is down, not moved, don't wait for it twice
+            if not cached or is_timeout(e):
+                raise
+            self.close_socket()
+            new_address, _ = self.cache.resolve(host, refresh=True)
+            if new_address == address:
+                raise
+            print(f"Cached address of {host} failed: {e}, retrying at {new_address}")
+        return self.connect_address(host, new_address)
+
+    def connect_any(self):
+        """Connect to the first reachable broker, fastest first"""
+        if self.cache is None:
+            self.cache = BrokerCache(self.brokers, self.port, self.dns_ttl)
+        for host in self.cache.ordered():
+            try:
+                latency = self.connect_host(host)
+            except (OSError, MQTTException) as e:
+                print(f"Broker {host} unreachable: {e}")
+                self.close_socket()
+                self.cache.record(host, None)
+                continue
+            self.cache.record(host, latency)
+            self.cache.save()
+            print(f"Connected to broker {host}")
+            return
+        self.cache.save()
+        raise OSError("No MQTT broker reachable")
+
     def publish(self, topic, message):
-        self.client.connect()
+        self.connect_any()
         time.sleep_ms(100)
         self.client.publish(topic, message)
-        time.sleep_ms(100)            
+        time.sleep_ms(100)
         self.client.disconnect()
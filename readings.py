@@ -0,0 +1,133 @@
+"""
+Compact storage for sensor readings
+Values are kept as integers scaled by 100 in array columns, so a reading
+costs 12 bytes instead of a dict with four string keys
+"""
+from array import array
+import struct
+
+SCALE = 100
+ROW_FORMAT = '<ihiH'  # timestamp, temp, pressure, humidity
+ROW_SIZE = struct.calcsize(ROW_FORMAT)
+HEADER_FORMAT = '<H'  # number of rows
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+
+def parse_scaled(text):
+    """Parse a decimal string like '23.45' into 2345 without using floats, rounding half away from zero"""
+    dot = text.find('.')
+    if dot < 0:
+        return int(text) * SCALE
+    whole = int(text[:dot])
+    digits = text[dot + 1:]
+    frac = int((digits + '00')[:2])
+    if len(digits) > 2 and digits[2] >= '5':
+        frac += 1
+    if text.startswith('-'):
+        return whole * SCALE - frac
+    return whole * SCALE + frac
+
+
+def format_scaled(value):
+    """Format a scaled integer as a decimal string, 2345 -> '23.45'"""
+    sign = '-' if value < 0 else ''
+    value = abs(value)
+    return '%s%d.%02d' % (sign, value // SCALE, value % SCALE)
+
+
+class Reading:
+    """A single reading, values scaled by 100"""
+    __slots__ = ('timestamp', 'temp', 'pressure', 'humidity')
+
+    def __init__(self, timestamp, temp, pressure, humidity):
+        self.timestamp = timestamp
+        self.temp = temp
+        self.pressure = pressure
+        self.humidity = humidity
+
+
+class ReadingBuffer:
+    """Fixed-capacity ring buffer of readings, the oldest is overwritten when full"""
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = array('i', [0] * capacity)
+        self.temps = array('h', [0] * capacity)
+        self.pressures = array('i', [0] * capacity)
+        self.humidities = array('H', [0] * capacity)
+        self.start = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError('reading index out of range')
+        j = (self.start + i) % self.capacity
+        return Reading(self.timestamps[j], self.temps[j], self.pressures[j], self.humidities[j])
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def append(self, reading):
+        self.add(reading.timestamp, reading.temp, reading.pressure, reading.humidity)
+
+    def add(self, timestamp, temp, pressure, humidity):
+        j = (self.start + self.count) % self.capacity
+        if self.count == self.capacity:
+            self.start = (self.start + 1) % self.capacity
+        else:
+            self.count += 1
+        self.timestamps[j] = timestamp
+        self.temps[j] = temp
+        self.pressures[j] = pressure
+        self.humidities[j] = humidity
+
+    def keep_last(self, n):
+        """Drop all but the newest n readings, without copying"""
+        if n < self.count:
+            self.start = (self.start + self.count - n) % self.capacity
+            self.count = n
+
+    def clear(self):
+        self.start = 0
+        self.count = 0
+
+    def to_bytes(self, prefix=b''):
+        """Serialize the readings, oldest first, after an optional prefix"""
+        offset = len(prefix) + HEADER_SIZE
+        data = bytearray(offset + self.count * ROW_SIZE)
+        data[:len(prefix)] = prefix
+        struct.pack_into(HEADER_FORMAT, data, len(prefix), self.count)
+        for i in range(self.count):
+            j = (self.start + i) % self.capacity
+            struct.pack_into(ROW_FORMAT, data, offset, self.timestamps[j], self.temps[j],
+                             self.pressures[j], self.humidities[j])
+            offset += ROW_SIZE
+        return data
+
+    def load_bytes(self, data, offset=0):
+        """Replace the contents with serialized readings, keeping the newest if they do not fit"""
+        self.clear()
+        count = struct.unpack_from(HEADER_FORMAT, data, offset)[0]
+        offset += HEADER_SIZE
+        count = min(count, (len(data) - offset) // ROW_SIZE)
+        for _ in range(count):
+            self.add(*struct.unpack_from(ROW_FORMAT, data, offset))
+            offset += ROW_SIZE
+
+    def to_json(self):
+        """JSON list of reading objects, as published over MQTT"""
+        parts = []
+        for i in range(self.count):
+            j = (self.start + i) % self.capacity
+            parts.append('{"timestamp": %d, "temp": %s, "pressure": %s, "humidity": %s}' % (
+                self.timestamps[j],
+                format_scaled(self.temps[j]),
+                format_scaled(self.pressures[j]),
+                format_scaled(self.humidities[j])
+            ))
+        return '[' + ', '.join(parts) + ']'
@@ -0,0 +1,82 @@
+"""
+Sectioned storage in RTC memory
+Lets readings and connection caches share the RTC memory that survives deep sleep
+"""
+from machine import RTC
+
+RTC_MEMORY_SIZE = 2048
+MAGIC = b'\xb2\x80'
+
+# Section tags
+READINGS = 1
+TLS_SESSION = 2
+BROKERS = 3
+
+# Sections that can be dropped to make room for others
+CACHES = (TLS_SESSION, BROKERS)
+
+rtc = RTC()
+
+
+def _load_all():
+    """Parse RTC memory into a tag -> bytes dict"""
+    sections = {}
+    try:
+        data = rtc.memory()
+    except:
+        return sections
+    if data[:2] != MAGIC:
+        return sections
+
+    # Each section is: tag (1 byte), length (2 bytes), payload
+    i = 2
+    while i + 3 <= len(data):
+        tag = data[i]
+        size = (data[i + 1] << 8) | data[i + 2]
+        i += 3
+        if i + size > len(data):
+            break
+        sections[tag] = data[i:i + size]
+        i += size
+    return sections
+
+
+def _dump_all(sections):
+    data = bytearray(MAGIC)
+    for tag, value in sections.items():
+        data.append(tag)
+        data.append(len(value) >> 8)
+        data.append(len(value) & 0xff)
+        data.extend(value)
+    return data
+
+
+def load(tag):
+    """Return the bytes stored under tag, or None"""
+    return _load_all().get(tag)
+
+
+def save(tag, value):
+    """Store bytes under tag, evicting caches if RTC memory is full"""
+    sections = _load_all()
+    sections[tag] = value
+    data = _dump_all(sections)
+    for cache in CACHES:
+        if len(data) <= RTC_MEMORY_SIZE:
+            break
+        if cache != tag and cache in sections:
+            del sections[cache]
+            data = _dump_all(sections)
+
+    if len(data) > RTC_MEMORY_SIZE:
+        return False
+    rtc.memory(data)
+    return True
+
+
+def clear(tag):
+    """Remove a section from RTC memory"""
+    sections = _load_all()
+    if tag in sections:
+        del sections[tag]
+        rtc.memory(_dump_all(sections))
@@ -2,14 +2,15 @@
 ESP32 BME280 Sensor with Deep Sleep and MQTT Batch Sending
 Collects 5 readings (one per minute), then sends via MQTT
 """
-from machine import Pin, I2C, deepsleep, RTC, reset
+from machine import Pin, I2C, deepsleep, reset
 import machine
 import bme280
 import time
-import json
 import gc
+import rtc_store
+from readings import Reading, ReadingBuffer, parse_scaled
 from wifi_utils import WiFiCls
-from mqtt_client import MqttClient
+from mqtt_client import MqttClient, DNS_TTL, CONNECT_TIMEOUT
 from bme280_handler import Bme280Sensor
 
 # Hardware configuration
@@ -18,9 +19,6 @@ SDA_PIN = 21
 SCL_PIN = 22
 BME_ADDRESS = 0x77
 
-# RTC memory to store readings between deep sleeps
-rtc = RTC()
-
 class SensorNode:
     def __init__(self, led, settings):
         self.settings_cls = settings
@@ -31,10 +29,14 @@ class SensorNode:
         )
         self.mqtt = MqttClient(
             self.settings.device.name,
-            self.settings.mqtt.broker,
+            self.settings.mqtt.get('brokers') or self.settings.mqtt.broker,
             mqtt_port=self.settings.mqtt.port,
             mqtt_user=self.settings.mqtt.username,
-            mqtt_password=self.settings.mqtt.password
+            mqtt_password=self.settings.mqtt.password,
+            tls=self.settings.mqtt.get('tls', False),
+            ca_file=self.settings.mqtt.get('ca'),
+            dns_ttl=self.settings.mqtt.get('dns_ttl', DNS_TTL),
+            timeout=self.settings.mqtt.get('timeout', CONNECT_TIMEOUT)
         )
         self.led = led
         try:
@@ -48,34 +50,30 @@ class SensorNode:
         """Get sensor reading"""
         temp, pressure, humidity = self.sensor.readings
         
-        # Parse values
-        temp_c = float(temp.replace('C', ''))
-        pressure_hpa = float(pressure.replace('hPa', ''))
-        humidity_pct = float(humidity.replace('%', ''))
-        
-        return {
-            'timestamp': time.time(),
-            'temp': temp_c,
-            'pressure': pressure_hpa,
-            'humidity': humidity_pct
-        }
+        # Parse values, scaled by 100
+        return Reading(
+            int(time.time()),
+            parse_scaled(temp[:-1]),  # 'C'
+            parse_scaled(pressure[:-3]),  # 'hPa'
+            parse_scaled(humidity[:-1])  # '%'
+        )
     
-    def load_readings(self):
+    def load_readings(self, capacity):
         """Load readings from RTC memory"""
+        readings = ReadingBuffer(capacity)
         try:
-            data = rtc.memory()
-            if data and len(data) > 4:
-                return json.loads(data.decode())
-            return []
+            data = rtc_store.load(rtc_store.READINGS)
+            if data:
+                readings.load_bytes(data)
         except:
-            return []
+            readings.clear()
+        return readings
     
     def save_readings(self, readings):
         """Save readings to RTC memory"""
         try:
-            data = json.dumps(readings).encode()
-            if len(data) <= 2048:  # RTC memory limit
-                rtc.memory(data)
+            data = readings.to_bytes()
+            if rtc_store.save(rtc_store.READINGS, data):  # RTC memory limit
                 return True
             else:
                 print("Data too large for RTC memory!")
@@ -95,7 +93,7 @@ class SensorNode:
                 return False
              
             # Publish data
-            message = json.dumps(readings)
+            message = readings.to_json()
             self.mqtt.publish(self.settings.mqtt.topic, message)
             print(f"Published {len(readings)} readings to {self.settings.mqtt.topic}")
             self.wifi.disconnect()
@@ -114,12 +112,12 @@ class SensorNode:
         # Get current reading
         print("Taking measurement...")
         reading = self.get_reading()
-        print(f"Temp: {reading['temp']:.1f}°C, "
-              f"Pressure: {reading['pressure']:.1f}hPa, "
-              f"Humidity: {reading['humidity']:.1f}%")
+        print(f"Temp: {reading.temp / 100:.1f}°C, "
+              f"Pressure: {reading.pressure / 100:.1f}hPa, "
+              f"Humidity: {reading.humidity / 100:.1f}%")
         
-        # Load existing readings
-        readings = self.load_readings()
+        # Load existing readings, room for twice the batch plus the new one
+        readings = self.load_readings(self.settings.readings.number * 2 + 1)
         print(f"Loaded {len(readings)} previous readings")
         
         # Add new reading
@@ -131,7 +129,7 @@ class SensorNode:
             
             if self.send_mqtt(readings):
                 # Clear readings after successful send
-                readings = []
+                readings.clear()
                 self.led.flash_led(3, 100)  # 3 fast flashes for successful send
             else:
                 # Keep readings if send failed
@@ -140,7 +138,7 @@ class SensorNode:
                 
                 # Limit stored readings to prevent memory overflow
                 if len(readings) > self.settings.readings.number * 2:
-                    readings = readings[-self.settings.readings.number:]
+                    readings.keep_last(self.settings.readings.number)
                     print(f"Trimmed readings to {len(readings)}")
         
         # Save readings
@@ -164,27 +162,26 @@ class CompactSensorNode(SensorNode):
     
     def load_data(self):
         """Load count and readings from RTC memory"""
+        readings = ReadingBuffer(self.settings.readings.number)
         try:
-            data = rtc.memory()
+            data = rtc_store.load(rtc_store.READINGS)
             if data and len(data) > 0:
-                # First byte is count, rest is JSON data
+                # First byte is count, rest is the readings
                 count = data[0]
                 if len(data) > 1:
-                    readings = json.loads(data[1:].decode())
-                else:
-                    readings = []
+                    readings.load_bytes(data, 1)
                 return count, readings
-            return 0, []
+            return 0, readings
         except:
-            return 0, []
+            readings.clear()
+            return 0, readings
     
     def save_data(self, count, readings):
         """Save count and readings to RTC memory"""
         try:
             # Store count as first byte
-            data = bytes([count]) + json.dumps(readings).encode()
-            rtc.memory(data)
-            return True
+            data = readings.to_bytes(bytes([count]))
+            return rtc_store.save(rtc_store.READINGS, data)
         except:
             return False
     
@@ -197,29 +194,25 @@ class CompactSensorNode(SensorNode):
         
         # Get reading
         reading = self.get_reading()
-        print(f"Reading: T:{reading['temp']:.1f}°C, "
-              f"P:{reading['pressure']:.1f}hPa, "
-              f"H:{reading['humidity']:.1f}%")
+        print(f"Reading: T:{reading.temp / 100:.1f}°C, "
+              f"P:{reading.pressure / 100:.1f}hPa, "
+              f"H:{reading.humidity / 100:.1f}%")
         
         # Load data
         count, readings = self.load_data()
         print(f"Count: {count}, Stored readings: {len(readings)}")
         
-        # Add new reading
+        # Add new reading, the buffer keeps only the last N to save memory
         readings.append(reading)
         count += 1
         
-        # Keep only last N readings to save memory
-        if len(readings) > self.settings.readings.number:
-            readings = readings[-self.settings.readings.number:]
-        
         # Check if time to send
         if count >= self.settings.readings.number:
             print(f"\nSending {len(readings)} readings...")
             
             if self.send_mqtt(readings):
                 count = 0
-                readings = []
+                readings.clear()
                 self.led.flash_led(3, 100)
             else:
                 self.led.flash_led(5, 100)